@@ -0,0 +1,191 @@
+'''
+Benchmarks of the checker on synthetic workloads, each scaled along one axis.
+
+    python bench.py                                  # run every workload
+    python bench.py -w width -w chain                # run some of them
+    python bench.py --save baseline.json             # record a baseline
+    python bench.py --baseline baseline.json --threshold 0.25
+
+Each case records, per `check()` or, for `lsp-edits`, per LSP request of a
+burst: the median wall time, the number of container objects allocated
+(counted through young-generation garbage collections, so in steps of
+`gc.get_threshold()[0]`, averaged over the timed runs), and the peak traced
+memory of the whole run.  Cases whose dependencies (pandas, pygls) are
+missing are skipped.
+
+With `--baseline`, exits with status 1 when any of these metrics of a case
+exceeds the baseline by more than the threshold (a fraction), and for
+allocations also by more than one collection step.
+'''
+import gc
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import spec
+from checker import check
+
+
+def statements(n):
+    '''`n` column accesses on a single frame.'''
+    lines = ['import pandas as pd',
+             "df = pd.DataFrame([[1, 'a']], columns=['a', 'b'])"]
+    lines += [f"s{i} = df['a']" for i in range(n)]
+    return '\n'.join(lines)
+
+def width(n):
+    '''A frame of `n` columns, selected as a whole.'''
+    labels = ', '.join(f"'c{i}'" for i in range(n))
+    row = ', '.join('1' for _ in range(n))
+    return '\n'.join(['import pandas as pd',
+                      f'df = pd.DataFrame([[{row}]], columns=[{labels}])',
+                      f'df[[{labels}]]'])
+
+def chain(n):
+    '''`n` rounds of assign, merge and groupby, each growing the frame.'''
+    lines = ['import pandas as pd',
+             "df = pd.DataFrame([[1, 'a']], columns=['a', 'b'])"]
+    for i in range(n):
+        lines += [f"r{i} = pd.DataFrame([[1, 1]], columns=['a', 'r{i}'])",
+                  f"df = df.assign(c{i}=df['a']).merge(r{i}, on='a')",
+                  "g = df.groupby('a')"]
+    return '\n'.join(lines)
+
+def csv_file(directory, rows, cols=8):
+    path = os.path.join(directory, f'bench_{rows}.csv')
+    with open(path, 'w') as f:
+        f.write(','.join(f'c{i}' for i in range(cols)) + '\n')
+        for r in range(rows):
+            f.write(','.join(str(r * cols + i) for i in range(cols)) + '\n')
+    return path
+
+
+def case_check(source):
+    return lambda: check(source)
+
+def case_csv(rows, directory):
+    import pandas  # read_csv imports it lazily, fail before measuring
+    path = csv_file(directory, rows)
+    source = f'import pandas as pd\ndf = pd.read_csv({path!r})\ndf["c0"]'
+    def run():
+        spec.schemas.clear()
+        check(source)
+    return run
+
+def case_lsp_edits(n):
+    '''`n` consecutive edits of the last cell of a 20-cell notebook.'''
+    import lsp
+    logging.disable(logging.INFO)
+    checker = lsp.Checker()
+    head = [['import pandas as pd\n', "df = pd.DataFrame([[1, 'a']], columns=['a', 'b'])"]]
+    head += [[f"df = df.assign(c{i}=df['a'])"] for i in range(18)]
+    def notebook(edit):
+        cells = head + [[f"df['c{edit % 18}']"]]
+        return json.dumps({'cells': [{'cell_type': 'code', 'execution_count': None,
+                                      'metadata': {}, 'outputs': [], 'source': src}
+                                     for src in cells],
+                           'metadata': {}, 'nbformat': 4, 'nbformat_minor': 5}, indent=1)
+    texts = [notebook(i) for i in range(n)]
+    def run():
+        for text in texts:
+            checker.validate_notebook('file:///bench.ipynb', text)
+    run.requests = n
+    return run
+
+
+WORKLOADS = {
+    'statements': ([100, 1000, 5000], lambda n, d: case_check(statements(n))),
+    'width':      ([10, 100, 1000],   lambda n, d: case_check(width(n))),
+    'chain':      ([5, 20, 50],       lambda n, d: case_check(chain(n))),
+    'csv':        ([1000, 100000],    case_csv),
+    'lsp-edits':  ([10, 50],          lambda n, d: case_lsp_edits(n)),
+}
+
+
+METRICS = ('time', 'allocations', 'peak')
+
+def collections():
+    # a young collection runs every gc.get_threshold()[0] container allocations
+    return gc.get_stats()[0]['collections'] * gc.get_threshold()[0]
+
+def measure(run, repeat):
+    requests = getattr(run, 'requests', 1)
+    times = []
+    allocations = collections()
+    for _ in range(repeat):
+        t = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - t)
+    allocations = collections() - allocations
+    # memory is measured apart, tracemalloc slows everything down
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'time': statistics.median(times) / requests,
+            'allocations': allocations / repeat / requests,
+            'peak': peak - start}
+
+def run_workloads(names, repeat):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name in names:
+            sizes, make = WORKLOADS[name]
+            for n in sizes:
+                key = f'{name}[{n}]'
+                try:
+                    run = make(n, directory)
+                except ImportError as e:
+                    print(f'{key}\tskipped: {e}', file=sys.stderr)
+                    break
+                results[key] = measure(run, repeat)
+                r = results[key]
+                print(key, f"{r['time'] * 1000:.2f}ms", f"{r['allocations']:.0f} allocations",
+                      f"{r['peak'] / 1024:.0f}KiB peak", sep='\t')
+    return results
+
+def regressions(results, baseline, threshold):
+    found = []
+    for key, r in results.items():
+        if key not in baseline:
+            continue
+        for metric in METRICS:
+            if metric not in baseline[key]:
+                continue
+            old, new = baseline[key][metric], r[metric]
+            if metric == 'allocations' and new - old <= gc.get_threshold()[0]:
+                continue
+            if old and new > old * (1 + threshold):
+                found.append(f'{key}\t{metric}\t{old:.6g} -> {new:.6g} (+{new / old - 1:.0%})')
+    return found
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark the checker.')
+    parser.add_argument('-w', '--workload', action='append', choices=list(WORKLOADS),
+                        help='workload to run, every one by default')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='timed runs per case')
+    parser.add_argument('--save', metavar='FILE', help='write the results as a baseline')
+    parser.add_argument('--baseline', metavar='FILE', help='compare against a baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed increase of any metric over the baseline, as a fraction')
+    args = parser.parse_args()
+    results = run_workloads(args.workload or list(WORKLOADS), args.repeat)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.threshold)
+        for line in found:
+            print('regression', line, sep='\t', file=sys.stderr)
+        sys.exit(1 if found else 0)
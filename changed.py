@@ -0,0 +1,102 @@
+import ast
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Set, Tuple
+
+from checker import check_file, format_error
+from notebook import code_cells
+
+SCRIPT_SUFFIXES = ('.py', '.ipynb')
+
+
+def git(*args):
+    # stderr goes through sys.stderr, which daemon.py sends back to the client
+    proc = subprocess.run(['git', *args], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    sys.stderr.write(proc.stderr.decode(errors='replace'))
+    proc.check_returncode()
+    return [p for p in proc.stdout.decode().split('\0') if p]
+
+def git_changes(rev) -> Tuple[Set[str], Set[str]]:
+    '''
+    Returns the absolute paths of the scripts and of the data files which
+    differ between `rev` and the working tree, untracked files included.
+    '''
+    top = git('rev-parse', '--show-toplevel')[0].strip()
+    paths = git('diff', '--name-only', '--no-renames', '-z', rev, '--')
+    paths += git('-C', top, 'ls-files', '--others', '--exclude-standard', '-z')
+    paths = {os.path.join(top, p) for p in paths}
+    scripts = {p for p in paths if p.endswith(SCRIPT_SUFFIXES)}
+    return scripts, paths - scripts
+
+def all_scripts() -> List[str]:
+    top = git('rev-parse', '--show-toplevel')[0].strip()
+    paths = git('-C', top, 'ls-files', '--cached', '--others', '--exclude-standard', '-z')
+    return [os.path.join(top, p) for p in paths if p.endswith(SCRIPT_SUFFIXES)]
+
+def referenced_data_files(path) -> Set[str]:
+    '''
+    Every string literal of a script taken as a path, resolved against the
+    working directory as `read_csv` does.  Scripts that do not parse
+    reference nothing.
+    '''
+    try:
+        text = open(path).read()
+        if path.endswith('.ipynb'):
+            sources = [src for _, src in code_cells(json.loads(text))]
+        else:
+            sources = [text]
+        trees = [ast.parse(src) for src in sources]
+    except (OSError, ValueError, SyntaxError):
+        return set()
+    except (KeyError, TypeError, AttributeError):
+        # a notebook without the usual cells/source structure
+        return set()
+    return {os.path.abspath(node.value)
+            for tree in trees for node in ast.walk(tree)
+            if type(node) is ast.Constant and type(node.value) is str
+               and node.value and '\n' not in node.value}
+
+def select(rev) -> List[str]:
+    '''
+    Scripts whose own source changed since `rev`, or which reference a data
+    file that changed since `rev`.
+    '''
+    scripts, data_files = git_changes(rev)
+    selected = {p for p in scripts if os.path.exists(p)}
+    if data_files:
+        for p in all_scripts():
+            if p not in selected and os.path.exists(p) and referenced_data_files(p) & data_files:
+                selected.add(p)
+    return sorted(selected)
+
+def run(path):
+    try:
+        return [format_error(e) for e in check_file(path)], None
+    except Exception as e:
+        return [], f'{type(e).__name__}: {e}'
+
+def check_changed(rev, jobs=None):
+    '''
+    Checks the scripts selected by `select(rev)` in parallel and prints their
+    errors prefixed by the script path.  Returns the exit status.
+    '''
+    try:
+        scripts = select(rev)
+    except subprocess.CalledProcessError as e:
+        print(f'git failed: {e}', file=sys.stderr)
+        return 2
+    status = 0
+    if not scripts:
+        return status
+    with ProcessPoolExecutor(jobs) as pool:
+        for path, (lines, failure) in zip(scripts, pool.map(run, scripts)):
+            name = os.path.relpath(path)
+            for line in lines:
+                print(name, line, sep='\t')
+            if failure:
+                print(name, failure, sep='\t', file=sys.stderr)
+                status = 1
+    return status
@@ -1,4 +1,7 @@
 import ast
+import copy
+import os
+import sys
 
 from typing import List
 
@@ -130,7 +133,7 @@ class Interpreter:
 class Ty(Interpreter):
     env = {}
     def Module(self, a, body):
-        return body[-1]
+        return body[-1] if body else None
     def Expression(self, a, body):
         return self.interpret(body)
     def Import(self, a, names):
@@ -282,6 +285,53 @@ class TyError(TyLog):
         f.__name__ = attr
         return f
 
+def spec_name(f):
+    if getattr(f, '__module__', None) != 'spec':
+        return None
+    return getattr(f, '__qualname__', type(f).__qualname__)
+
+class TyProfile(TyError):
+    '''
+    TyError recording timings into a `profiling.Profile`, only used when
+    profiling so that normal checks pay nothing for it.
+    '''
+    def __init__(self, profile):
+        TyError.__init__(self)
+        self.profile = profile
+
+    def interpret(self, a):
+        if not isinstance(a, ast.AST):
+            return TyError.interpret(self, a)
+        p = self.profile
+        start = p.enter()
+        try:
+            return TyError.interpret(self, a)
+        finally:
+            own = p.exit(p.nodes, type(a).__name__, start)
+            if hasattr(a, 'lineno'):
+                p.line(a.lineno, own)
+
+    def Call(self, a, f, args, kwargs):
+        name = spec_name(f)
+        if name is None:
+            return Ty.Call(self, a, f, args, kwargs)
+        p = self.profile
+        start = p.enter()
+        try:
+            return Ty.Call(self, a, f, args, kwargs)
+        finally:
+            p.exit(p.specs, name, start)
+
+    def Subscript(self, a, v, _slice, _ctx):
+        if type(_ctx) == ast.Store or spec_name(type(v)) is None:
+            return Ty.Subscript(self, a, v, _slice, _ctx)
+        p = self.profile
+        start = p.enter()
+        try:
+            return Ty.Subscript(self, a, v, _slice, _ctx)
+        finally:
+            p.exit(p.specs, f'{type(v).__qualname__}.__getitem__', start)
+
 class Sp(Interpreter):
     env = {}
     def Module(self, a, body):
@@ -301,18 +351,102 @@ class Literal:
     def __getitem__(self, value):
         return LiteralType(value)
 
-def check(code):
-    itpr = TyError()
+def check(code, env=None, profile=None):
+    itpr = TyError() if profile is None else TyProfile(profile)
+    itpr.env = {} if env is None else env
     itpr.env['Literal'] = Literal()
-    itpr.interpret(ast.parse(code))
+    itpr.data_files = spec.data_files = set()
+    spec.profile = profile
+    try:
+        itpr.interpret(ast.parse(code))
+    finally:
+        spec.profile = None
     return itpr
 
-if __name__ == '__main__':
-    import sys
-    if len(sys.argv) > 1:
-        code = open(sys.argv[1]).read()
+def snapshot_env(env):
+    # modules (e.g. `pd` bound to spec) are shared, everything else is copied
+    return copy.deepcopy(env, {id(spec): spec})
+
+def stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+# (working directory, script) -> (stamps of the script and its data files, errors,
+# NotebookChecker of a notebook), only kept by long-running processes such as daemon.py
+results = None
+
+def check_file(path, profile=None):
+    '''
+    Checks a Python script or a Jupyter notebook, returning its errors.
+    With `results`, unchanged files are not checked again and notebooks are
+    only re-checked from their first edited cell.
+    '''
+    key = (os.getcwd(), os.path.abspath(path))
+    stamps, errors, nbc = None, None, None
+    if results is not None and profile is None and key in results:
+        stamps, errors, nbc = results[key]
+        if all(stamp(p) == s for p, s in stamps.items()):
+            return errors
+    source_stamp = stamp(path)
+    if path.endswith('.ipynb'):
+        from notebook import NotebookChecker
+        changed = {p for p, s in stamps.items() if stamp(p) != s} if stamps else ()
+        if nbc is None:
+            nbc = NotebookChecker()
+        nbc.check(open(path).read(), changed, profile)
+        errors, data_files = nbc.errors, nbc.data_files
     else:
-        code = sys.stdin.read()
-    itpr = check(code)
-    for e in itpr.errors:
-        print(e['lineno'], e['col_offset'], e['error'].message, sep='\t')
+        itpr = check(open(path).read(), profile=profile)
+        errors, data_files = itpr.errors, itpr.data_files
+    if results is not None and profile is None:
+        stamps = {p: stamp(p) for p in data_files}
+        stamps[key[1]] = source_stamp
+        results[key] = (stamps, errors, nbc)
+    return errors
+
+def format_error(e):
+    fields = [e['lineno'], e['col_offset'], e['error'].message]
+    if 'cell' in e:
+        fields.insert(0, e['cell'])
+    return '\t'.join(map(str, fields))
+
+def main(argv=None, prog=None):
+    import argparse
+    def positive_int(s):
+        n = int(s)
+        if n < 1:
+            raise argparse.ArgumentTypeError(f'must be at least 1: {s!r}')
+        return n
+    parser = argparse.ArgumentParser(prog=prog, description='Check pandas code.')
+    parser.add_argument('file', nargs='?', help='.py or .ipynb file, stdin if omitted')
+    parser.add_argument('--changed-since', metavar='REV',
+                        help='check every script affected by changes since a git revision')
+    parser.add_argument('-j', '--jobs', type=positive_int, default=None,
+                        help='number of worker processes for --changed-since')
+    parser.add_argument('--profile', action='store_true',
+                        help='print per node, spec function, line and data file timings to stderr')
+    args = parser.parse_args(argv)
+    if args.changed_since:
+        if args.profile:
+            parser.error('--profile cannot be combined with --changed-since')
+        from changed import check_changed
+        return check_changed(args.changed_since, args.jobs)
+    profile = None
+    if args.profile:
+        from profiling import Profile
+        profile = Profile()
+    if args.file:
+        errors = check_file(args.file, profile)
+    else:
+        errors = check(sys.stdin.read(), profile=profile).errors
+    for e in errors:
+        print(format_error(e))
+    if profile:
+        print(profile.report(), file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
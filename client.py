@@ -0,0 +1,128 @@
+'''
+Drop-in replacement for `python checker.py ...` forwarding the command line to
+a resident `daemon.py`, started on first use.  Only the standard library is
+imported here, the checker and pandas stay loaded in the daemon.
+'''
+import json
+import os
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# seconds to wait for a freshly started daemon before checking in-process
+STARTUP_TIMEOUT = 10.0
+
+
+def socket_path():
+    if 'PDCHECKER_SOCKET' in os.environ:
+        return os.environ['PDCHECKER_SOCKET']
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.path.join(os.environ['XDG_RUNTIME_DIR'], 'pdchecker.sock')
+    return os.path.join(tempfile.gettempdir(), f'pdchecker-{os.getuid()}', 'pdchecker.sock')
+
+def private_directory(path):
+    '''
+    Creates the directory of the socket `path` if needed, and tells whether
+    only the current user can put a socket there.
+    '''
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    except OSError:
+        return False
+    st = os.lstat(directory)
+    return (stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid()
+            and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH))
+
+def connect(path):
+    # never send a command line, working directory or stdin to someone else's socket
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return None
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+def start_daemon(path):
+    subprocess.Popen([sys.executable, os.path.join(HERE, 'daemon.py'), '--socket', path],
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        sock = connect(path)
+        if sock:
+            return sock
+        time.sleep(0.05)
+    return None
+
+def request(sock, argv, stdin):
+    '''
+    Sends the command line and returns the daemon's reply.  `stdin` holds the
+    client's stdin once it has been read, for retries and the fallback.
+    '''
+    f = sock.makefile('rwb')
+    def send(msg):
+        f.write(json.dumps(msg).encode() + b'\n')
+        f.flush()
+    send({'argv': argv, 'cwd': os.getcwd(), 'prog': os.path.basename(sys.argv[0])})
+    while True:
+        line = f.readline()
+        if not line:
+            raise ConnectionError('daemon closed the connection')
+        reply = json.loads(line)
+        # the daemon reads stdin only when the command line asks for it
+        if reply.get('stdin'):
+            if not stdin:
+                stdin.append(sys.stdin.read())
+            send({'stdin': stdin[0]})
+            continue
+        return reply
+
+def fallback(argv, stdin):
+    checker = os.path.join(HERE, 'checker.py')
+    if not stdin:
+        os.execv(sys.executable, [sys.executable, checker] + argv)
+    # stdin was already consumed, hand over what was read
+    return subprocess.run([sys.executable, checker] + argv, input=stdin[0].encode()).returncode
+
+def main(argv):
+    path = socket_path()
+    stdin = []
+    if not private_directory(path):
+        return fallback(argv, stdin)
+    for _ in range(2):
+        sock = connect(path) or start_daemon(path)
+        if sock is None:
+            break
+        try:
+            with sock:
+                reply = request(sock, argv, stdin)
+        except (OSError, ValueError):
+            # the daemon went away, e.g. it was killed or restarted with
+            # this connection still waiting in its backlog
+            continue
+        # the daemon exits when its sources changed, the next one loads them
+        if reply.get('restart'):
+            continue
+        sys.stdout.write(reply['stdout'])
+        sys.stderr.write(reply['stderr'])
+        return reply['status']
+    return fallback(argv, stdin)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
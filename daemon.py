@@ -0,0 +1,149 @@
+'''
+Resident checker serving `client.py` over a Unix socket.  Modules, parsed data
+file schemas (`spec.schemas`) and the errors of unchanged scripts
+(`checker.results`) stay in memory between requests.
+
+    python daemon.py [--socket PATH]     # serve in the foreground
+    python daemon.py --stop              # stop a running daemon
+
+Requests are handled one at a time, each in the client's working directory.
+When one of the daemon's own source files changes, it answers the next request
+by asking the client to start a new daemon, and exits.
+'''
+import io
+import json
+import os
+import socketserver
+import sys
+import traceback
+from contextlib import redirect_stdout, redirect_stderr
+
+import checker
+# imported up front so that requests start warm and source_stamps covers them
+import changed
+import notebook
+import profiling
+from client import socket_path, private_directory, connect
+
+
+class RemoteStdin(io.TextIOBase):
+    '''Fetches the client's stdin when the checker reads it.'''
+    def __init__(self, send, receive):
+        self.send = send
+        self.receive = receive
+    def read(self, size=-1):
+        self.send({'stdin': True})
+        return self.receive()['stdin']
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def send(self, msg):
+        self.wfile.write(json.dumps(msg).encode() + b'\n')
+        self.wfile.flush()
+
+    def receive(self):
+        return json.loads(self.rfile.readline())
+
+    def handle(self):
+        req = self.receive()
+        if req.get('stop'):
+            self.server.stopping = True
+            self.send({'stdout': '', 'stderr': '', 'status': 0})
+            return
+        sources = self.server.sources
+        if any(checker.stamp(f) != s for f, s in sources.items()):
+            # free the socket before the client starts the next daemon
+            close(self.server)
+            self.send({'restart': True})
+            return
+        self.send(self.run(req['argv'], req['cwd'], req.get('prog')))
+
+    def run(self, argv, cwd, prog):
+        out, err = io.StringIO(), io.StringIO()
+        stdin, old_cwd = sys.stdin, os.getcwd()
+        sys.stdin = RemoteStdin(self.send, self.receive)
+        try:
+            os.chdir(cwd)
+            with redirect_stdout(out), redirect_stderr(err):
+                try:
+                    status = checker.main(argv, prog)
+                except SystemExit as e:
+                    # argparse errors and --help end up here
+                    if type(e.code) is str:
+                        print(e.code, file=sys.stderr)
+                        status = 1
+                    else:
+                        status = e.code
+                except Exception:
+                    traceback.print_exc()
+                    status = 1
+        finally:
+            sys.stdin = stdin
+            os.chdir(old_cwd)
+        return {'stdout': out.getvalue(), 'stderr': err.getvalue(), 'status': int(status or 0)}
+
+
+def source_stamps():
+    '''Stamps of the modules of this directory, all imported at startup.'''
+    here = os.path.dirname(os.path.abspath(__file__))
+    files = {os.path.abspath(m.__file__) for m in list(sys.modules.values())
+             if getattr(m, '__file__', None)}
+    return {f: checker.stamp(f) for f in files if os.path.dirname(f) == here}
+
+def close(server):
+    server.stopping = True
+    if not server.closed:
+        server.closed = True
+        server.server_close()
+        os.unlink(server.server_address)
+
+def serve(path):
+    if not private_directory(path):
+        sys.exit(f'{os.path.dirname(path)} is writable by other users')
+    if os.path.exists(path):
+        sock = connect(path)
+        if sock:
+            sock.close()
+            sys.exit(f'already serving on {path}')
+        os.unlink(path)
+    checker.results = {}
+    try:
+        # warm up, read_csv would import it on the first request otherwise
+        import pandas
+    except ImportError:
+        pass
+    old_umask = os.umask(0o077)
+    try:
+        server = socketserver.UnixStreamServer(path, Handler)
+    finally:
+        os.umask(old_umask)
+    server.stopping = False
+    server.closed = False
+    server.sources = source_stamps()
+    try:
+        while not server.stopping:
+            server.handle_request()
+    finally:
+        close(server)
+
+def stop(path):
+    sock = connect(path)
+    if sock is None:
+        sys.exit(f'not serving on {path}')
+    with sock:
+        f = sock.makefile('rwb')
+        f.write(json.dumps({'stop': True}).encode() + b'\n')
+        f.flush()
+        f.readline()
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Resident checker for client.py.')
+    parser.add_argument('--socket', default=socket_path(), help='Unix socket path')
+    parser.add_argument('--stop', action='store_true', help='stop the running daemon')
+    args = parser.parse_args()
+    if args.stop:
+        stop(args.socket)
+    else:
+        serve(args.socket)
@@ -1,22 +1,66 @@
-from pygls.features import TEXT_DOCUMENT_DID_OPEN, TEXT_DOCUMENT_DID_SAVE, TEXT_DOCUMENT_DID_CHANGE
+from pygls.features import TEXT_DOCUMENT_DID_OPEN, TEXT_DOCUMENT_DID_SAVE, TEXT_DOCUMENT_DID_CHANGE, TEXT_DOCUMENT_DID_CLOSE
 from pygls import features
 from pygls.server import LanguageServer
 from pygls.types import Range, Position, Diagnostic, SignatureHelp, SignatureInformation, Hover
 
-from checker import check
+from checker import check, stamp
+from notebook import NotebookChecker, source_positions
+from profiling import Profile
+from collections import defaultdict
+import asyncio
 import logging
 
 server = LanguageServer()
 logging.basicConfig(level=logging.DEBUG)
 
+# seconds between two polls of the data files read by open documents
+WATCH_INTERVAL = 1.0
+
+# workspace/executeCommand returning the profile of a check of a document
+CMD_PROFILE = 'pdchecker.profile'
+
 
 class Checker:
 
-    def validate(self, source):
-        self.itpr = check(source)
+    def __init__(self):
+        self.notebooks = {}
+        # document uri -> interpreter of its last check, for hover and signature help
+        self.itprs = {}
+        # document uri -> data files its last check read, and the reverse
+        self.data_files = {}
+        self.dependents = defaultdict(set)
+        self.stamps = {}
+
+    def track(self, uri, data_files):
+        for path in self.data_files.pop(uri, ()):
+            self.dependents[path].discard(uri)
+            if not self.dependents[path]:
+                del self.dependents[path]
+                self.stamps.pop(path, None)
+        self.data_files[uri] = set(data_files)
+        for path in data_files:
+            self.dependents[path].add(uri)
+            if path not in self.stamps:
+                self.stamps[path] = stamp(path)
+
+    def changed_data_files(self):
+        changed = set()
+        for path, old in self.stamps.items():
+            new = stamp(path)
+            if new != old:
+                self.stamps[path] = new
+                changed.add(path)
+        return changed
+
+    def affected(self, changed):
+        return set().union(*(self.dependents.get(path, ()) for path in changed))
+
+    def validate(self, source, uri=None):
+        itpr = self.itprs[uri] = check(source)
+        self.track(uri, itpr.data_files)
         diagnostics = []
-        logging.debug(f'itpr errors: {self.itpr.errors}')
-        for item in self.itpr.errors:
+        logging.debug(f'itpr errors: {itpr.errors}')
+        for item in itpr.errors:
             l1 = item['lineno'] - 1
             c1 = item['col_offset']
             l2 = item['end_lineno'] - 1
@@ -28,7 +72,40 @@ class Checker:
                 source="PDChecker"))
         return diagnostics
 
-    def help(self, pos):
+    def validate_notebook(self, uri, source, changed=()):
+        nbc = self.notebooks.setdefault(uri, NotebookChecker())
+        reused = nbc.check(source, changed)
+        self.track(uri, nbc.data_files)
+        logging.debug(f'notebook {uri}: reused {reused} of {len(nbc.cells)} cells')
+        positions = source_positions(source)
+        def to_position(cell, lineno, col):
+            lines = positions.get(cell) or [[(0, 0)]]
+            line = lines[min(lineno - 1, len(lines) - 1)]
+            return Position(*line[min(col, len(line) - 1)])
+        diagnostics = []
+        for item in nbc.errors:
+            start = to_position(item['cell'], item['lineno'], item['col_offset'])
+            end = to_position(item['cell'], item['end_lineno'], item['end_col_offset'])
+            msg = item['error'].message
+            diagnostics.append(Diagnostic(
+                range=Range(start, end),
+                message=f"[cell {item['cell']}] {msg}",
+                source="PDChecker"))
+        return diagnostics
+
+    def profile(self, uri, source):
+        # profiled from scratch, cached notebook cells would hide most of the work
+        profile = Profile()
+        if uri.endswith('.ipynb'):
+            NotebookChecker().check(source, profile=profile)
+        else:
+            check(source, profile=profile)
+        return profile
+
+    def help(self, uri, pos):
+        # notebooks are not supported, their srcmaps are in cell coordinates
+        if uri not in self.itprs:
+            return []
         def inside(node):
             if not hasattr(node, 'lineno') or not hasattr(node, 'col_offset'):
                 return False
@@ -39,35 +116,80 @@ class Checker:
             if hasattr(node, 'end_col_offset'):
                 col_matched = (node.end_col_offset) >= pos.character and col_matched
             return row_matched and col_matched
-        candidates = [(n, t) for n, t in self.itpr.srcmap.items() if inside(n)]
+        candidates = [(n, t) for n, t in self.itprs[uri].srcmap.items() if inside(n)]
         return candidates
 
 
 checker = Checker()
+watcher = None
+
+
+def publish(ls, uri, changed=()):
+    text_doc = ls.workspace.get_document(uri)
+    if uri.endswith('.ipynb'):
+        diagnostics = checker.validate_notebook(uri, text_doc.source, changed)
+    else:
+        diagnostics = checker.validate(text_doc.source, uri)
+    logging.debug(f'sending diagnostics: {diagnostics!r}')
+    ls.publish_diagnostics(uri, diagnostics)
+
+
+async def watch_data_files(ls):
+    while True:
+        await asyncio.sleep(WATCH_INTERVAL)
+        changed = checker.changed_data_files()
+        if not changed:
+            continue
+        logging.debug(f'data files changed: {changed}')
+        for uri in checker.affected(changed):
+            try:
+                publish(ls, uri, changed)
+            except Exception:
+                # e.g. unsupported or half-typed code, which raises SyntaxError
+                logging.exception(f'cannot re-check {uri}')
+                # its cached cells may still hold the old schema
+                checker.notebooks.pop(uri, None)
 
 
 @server.feature(TEXT_DOCUMENT_DID_CHANGE)
 @server.feature(TEXT_DOCUMENT_DID_OPEN)
 @server.feature(TEXT_DOCUMENT_DID_SAVE)
 async def handle_feature(ls, params):
-    text_doc = ls.workspace.get_document(params.textDocument.uri)
-    diagnostics = checker.validate(text_doc.source)
-    logging.debug(f'sending diagnostics: {diagnostics!r}')
-    ls.publish_diagnostics(params.textDocument.uri, diagnostics)
+    global watcher
+    if watcher is None or watcher.done():
+        watcher = asyncio.ensure_future(watch_data_files(ls))
+    publish(ls, params.textDocument.uri)
+
+
+@server.feature(TEXT_DOCUMENT_DID_CLOSE)
+async def handle_close(ls, params):
+    checker.notebooks.pop(params.textDocument.uri, None)
+    checker.itprs.pop(params.textDocument.uri, None)
+    checker.track(params.textDocument.uri, ())
+    checker.data_files.pop(params.textDocument.uri, None)
+
+
+@server.command(CMD_PROFILE)
+async def handle_profile(ls, args):
+    uri = args[0]
+    text_doc = ls.workspace.get_document(uri)
+    return checker.profile(uri, text_doc.source).as_dict()
 
 
 @server.feature(features.SIGNATURE_HELP)
 async def handle_sighelp(ls: LanguageServer, params):
-    text_doc = ls.workspace.get_document(params.textDocument.uri)
     pos = params.position
-    candidates = checker.help(pos)
+    candidates = checker.help(params.textDocument.uri, pos)
     return SignatureHelp(signatures=[SignatureInformation(f'{t!r}') for t in candidates])
 
 @server.feature(features.HOVER)
 async def handle_hover(ls, params):
-    text_doc = ls.workspace.get_document(params.textDocument.uri)
     pos = params.position
-    return Hover(contents=repr(checker.help(pos)[0][1]))
+    candidates = checker.help(params.textDocument.uri, pos)
+    if not candidates:
+        return None
+    return Hover(contents=repr(candidates[0][1]))
 
 
-server.start_tcp('localhost', 8080)
+if __name__ == '__main__':
+    server.start_tcp('localhost', 8080)
@@ -0,0 +1,155 @@
+import json
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import List, Dict, Set, Tuple, Any
+
+from checker import check, snapshot_env
+
+
+def strip_magics(source):
+    # IPython syntax is not Python; blank it out but keep line numbers intact
+    lines = source.split('\n')
+    if lines and lines[0].startswith('%%'):
+        return '\n' * (len(lines) - 1)
+    return '\n'.join('' if l.lstrip().startswith(('%', '!')) else l for l in lines)
+
+def join_source(source):
+    if type(source) is list:
+        return ''.join(source)
+    return source
+
+def code_cells(nb):
+    '''
+    Returns `(cell index, source)` of every code cell in execution order.
+    Falls back to document order unless every code cell has been executed.
+    '''
+    cells = [(i, c) for i, c in enumerate(nb['cells']) if c['cell_type'] == 'code']
+    if cells and all(c.get('execution_count') for _, c in cells):
+        cells.sort(key=lambda ic: ic[1]['execution_count'])
+    return [(i, strip_magics(join_source(c['source']))) for i, c in cells]
+
+
+@dataclass
+class CellResult:
+    index: int
+    source: str
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    srcmap: Dict[Any, Any] = field(default_factory=dict)
+    data_files: Set[str] = field(default_factory=set)
+    # abstract environment at the end of this cell, never mutated afterwards
+    env: Dict[str, Any] = field(default_factory=dict)
+
+
+class NotebookChecker:
+    '''
+    Checks the code cells of a notebook one by one, caching the environment
+    after each cell.  Re-checking resumes from the first cell whose source
+    differs from the previous run, or which read one of the `changed` data
+    files.
+    '''
+    def __init__(self):
+        self.cells: List[CellResult] = []
+
+    def check(self, text, changed=(), profile=None):
+        cells = code_cells(json.loads(text))
+        start = 0
+        while (start < len(cells) and start < len(self.cells)
+               and cells[start][1] == self.cells[start].source
+               and not self.cells[start].data_files.intersection(changed)):
+            self.cells[start].index = cells[start][0]
+            start += 1
+        self.cells = self.cells[:start]
+        for index, source in cells[start:]:
+            env = snapshot_env(self.cells[-1].env) if self.cells else None
+            if profile:
+                profile.cell = index
+            itpr = check(source, env, profile)
+            self.cells.append(CellResult(index, source, itpr.errors, itpr.srcmap,
+                                         itpr.data_files, itpr.env))
+        return start
+
+    @property
+    def data_files(self):
+        return set().union(*(c.data_files for c in self.cells))
+
+    @property
+    def errors(self):
+        return [dict(e, cell=c.index) for c in self.cells for e in c.errors]
+
+
+def string_offsets(text, j):
+    '''
+    Raw offsets of every character of the JSON string literal whose opening
+    quote is at `j`, followed by the offset of its closing quote.
+    '''
+    offsets = []
+    k = j + 1
+    while text[k] != '"':
+        offsets.append(k)
+        if text[k] != '\\':
+            k += 1
+        elif text[k + 1] != 'u':
+            k += 2
+        else:
+            # a surrogate pair decodes to a single character
+            high = 0xd800 <= int(text[k + 2:k + 6], 16) < 0xdc00
+            k += 12 if high and text[k + 6:k + 8] == '\\u' else 6
+    offsets.append(k)
+    return offsets
+
+def source_positions(text) -> Dict[int, List[List[Tuple[int, int]]]]:
+    '''
+    Maps every character of every line of each cell's source, plus the end of
+    the line, to the (line, character) at which it appears inside the raw
+    `.ipynb` JSON text, so diagnostics can be shown on the notebook file itself.
+    '''
+    nb = json.loads(text)
+    starts = [0]
+    for i, ch in enumerate(text):
+        if ch == '\n':
+            starts.append(i + 1)
+    def position(offset):
+        line = bisect_right(starts, offset) - 1
+        return (line, offset - starts[line])
+
+    decoder = json.JSONDecoder()
+    positions = {}
+    pos = 0
+    for i, cell in enumerate(nb['cells']):
+        while True:
+            k = text.find('"source"', pos)
+            if k < 0:
+                return positions
+            pos = k + len('"source"')
+            if text[k - 1] == '\\':
+                continue
+            j = text.find(':', pos) + 1
+            while text[j].isspace():
+                j += 1
+            value, end = decoder.raw_decode(text, j)
+            if value != cell['source']:
+                continue
+            pos = end
+            break
+        # the closing quote stands for the end of a last line without newline
+        chars, offsets, end = '', [], j
+        if type(value) is list:
+            j += 1
+            for line in value:
+                j = text.index('"', j)
+                line_offsets = string_offsets(text, j)
+                chars += line
+                offsets += line_offsets[:-1]
+                end = line_offsets[-1]
+                j = end + 1
+        else:
+            line_offsets = string_offsets(text, j)
+            chars, offsets, end = value, line_offsets[:-1], line_offsets[-1]
+        lines = [[]]
+        for ch, offset in zip(chars, offsets):
+            lines[-1].append(position(offset))
+            if ch == '\n':
+                lines.append([])
+        lines[-1].append(position(end))
+        positions[i] = lines
+    return positions
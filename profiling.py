@@ -0,0 +1,77 @@
+from collections import defaultdict
+from time import perf_counter
+
+
+class Profile:
+    '''
+    Call counts and timings collected by `checker.check(..., profile=...)`:
+
+    * `nodes`: AST node type -> [count, cumulative, self] seconds
+    * `specs`: spec function or method -> [count, cumulative, self] seconds
+    * `lines`: (cell, line) -> [nodes evaluated, self] seconds
+    * `io`:    data file -> [reads, seconds, bytes]
+
+    `cell` is None outside notebooks.
+    '''
+    def __init__(self):
+        self.nodes = defaultdict(lambda: [0, 0.0, 0.0])
+        self.specs = defaultdict(lambda: [0, 0.0, 0.0])
+        self.lines = defaultdict(lambda: [0, 0.0])
+        self.io = defaultdict(lambda: [0, 0.0, 0])
+        self.cell = None
+        # time spent in the children of each running frame
+        self.stack = []
+
+    def enter(self):
+        self.stack.append(0.0)
+        return perf_counter()
+
+    def exit(self, table, key, start):
+        elapsed = perf_counter() - start
+        own = elapsed - self.stack.pop()
+        if self.stack:
+            self.stack[-1] += elapsed
+        entry = table[key]
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] += own
+        return own
+
+    def line(self, lineno, own):
+        entry = self.lines[(self.cell, lineno)]
+        entry[0] += 1
+        entry[1] += own
+
+    def read(self, path, seconds, size):
+        entry = self.io[path]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] += size
+
+    def as_dict(self):
+        def line_key(key):
+            cell, lineno = key
+            return str(lineno) if cell is None else f'{cell}:{lineno}'
+        return {
+            'nodes': {k: dict(zip(('count', 'cumulative', 'self'), v)) for k, v in self.nodes.items()},
+            'specs': {k: dict(zip(('count', 'cumulative', 'self'), v)) for k, v in self.specs.items()},
+            'lines': {line_key(k): dict(zip(('count', 'self'), v)) for k, v in self.lines.items()},
+            'io':    {k: dict(zip(('reads', 'seconds', 'bytes'), v)) for k, v in self.io.items()},
+        }
+
+    def report(self, limit=20):
+        d = self.as_dict()
+        out = []
+        def table(title, rows, columns, sort):
+            out.append(f'{title}\t' + '\t'.join(columns))
+            rows = sorted(rows.items(), key=lambda kv: kv[1][sort], reverse=True)
+            for key, row in rows[:limit]:
+                out.append(f'{key}\t' + '\t'.join(
+                    f'{row[c] * 1000:.3f}ms' if type(row[c]) is float else str(row[c])
+                    for c in columns))
+            out.append('')
+        table('node', d['nodes'], ('count', 'cumulative', 'self'), 'self')
+        table('spec', d['specs'], ('count', 'cumulative', 'self'), 'self')
+        table('line', d['lines'], ('count', 'self'), 'self')
+        table('io',   d['io'],    ('reads', 'seconds', 'bytes'), 'seconds')
+        return '\n'.join(out)
@@ -1,5 +1,6 @@
 from typing import List, Tuple, Callable, Dict, Optional, Type, Any, Union, Generic, TypeVar
 from dataclasses import dataclass, field
+import time
 
 class CheckerError(Exception):
     def __init__(self, message, ast=None):
@@ -56,12 +57,37 @@ def from_dtype(dt):
         raise CheckerNotImplementedError(obj=dt)
 
 
+# absolute paths of the data files read by the current check, see checker.check
+data_files = set()
+
+# path -> ((mtime, size), DataFrame), re-read once the file changes on disk
+schemas = {}
+
+# profiling.Profile of the current check, None unless profiling
+profile = None
+
 def read_csv(fp):
-    import pandas as pd
-    df = pd.read_csv(fp.val)
-    return DataFrame(_index=from_dtype(df.index.dtype),
-                     _columns={k: from_dtype(v)
-                                  for k, v in df.dtypes.to_dict().items()})
+    import os
+    path = os.path.abspath(fp.val)
+    data_files.add(path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        raise CheckerError(f'Cannot read {fp.val !r}.')
+    stamp = (st.st_mtime_ns, st.st_size)
+    # a profiled check reads the file again, or its I/O would not show up
+    if profile or path not in schemas or schemas[path][0] != stamp:
+        import pandas as pd
+        start = time.perf_counter()
+        df = pd.read_csv(path)
+        if profile:
+            profile.read(path, time.perf_counter() - start, st.st_size)
+        schemas[path] = (stamp, DataFrame(_index=from_dtype(df.index.dtype),
+                                          _columns={k: from_dtype(v)
+                                                       for k, v in df.dtypes.to_dict().items()}))
+    df = schemas[path][1]
+    # the cached frame must not be mutated by `df[...] = ...`
+    return DataFrame(_index=df.index, _columns=dict(df.columns))
 
 class Type:
     def subtype_of(self, other):
@@ -214,6 +240,8 @@ class DataFrame(Type):
 
 
     def __getattr__(self, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
         if attr in self.columns:
                 return Series(_index=self.index, _value=self.columns.get(attr))
         raise CheckerNotImplementedError(attr.ast, attr)